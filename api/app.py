@@ -1,12 +1,12 @@
-from fastapi import FastAPI, HTTPException
-from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Response
+from pydantic import TypeAdapter, ValidationError
+from typing import Any, Dict, List, Optional
+import anyio
+import orjson
 import pandas as pd
-from pathlib import Path
 import logging
 import sys
-
-project_root = Path(__file__).resolve().parent.parent
-sys.path.insert(0, str(project_root))
+import threading
 
 from .schemas import ProductRankedResponse, ProductDetailResponse
 from models.scoring_model import ProductScorer
@@ -30,70 +30,136 @@ app = FastAPI(
 scorer: Optional[ProductScorer] = None
 data_processor: Optional[DataProcessor] = None
 
+# In-memory cache of the processed CSV records and their serialized JSON per top_n,
+# invalidated when the file's mtime changes.
+RANKED_COLUMNS = ["Product Name", "Brand", "Price (USD)", "score", "rank"]
+PROCESSED_DTYPES = {"Product Name": str, "Brand": str, "Price (USD)": float, "score": float, "rank": int}
+_ranked_cache: Dict[str, Any] = {"mtime": None, "records": None, "json_by_top_n": {}}
+_ranked_cache_lock = threading.Lock()
+
+# Product Name -> validated ProductDetailResponse (None if that record failed validation),
+# invalidated when the raw file's mtime changes.
+_product_details_adapter = TypeAdapter(List[ProductDetailResponse])
+_product_index_cache: Dict[str, Any] = {"mtime": None, "index": None}
+_product_index_lock = threading.Lock()
+
 @app.on_event("startup")
 async def load_resources():
     global scorer, data_processor
     try:
         logger.info("API Startup: Loading resources...")
         scorer = ProductScorer(settings.WEIGHTS)
-        data_processor = DataProcessor()
+        data_processor = DataProcessor(scorer=scorer)
         if not settings.RAW_DATA_PATH.exists():
             logger.critical(f"Raw data file {settings.RAW_DATA_PATH} not found.")
+        else:
+            _load_product_index()
+            if not settings.PROCESSED_DATA_PATH.exists():
+                # Rank once here so requests never fall back to processing raw data on the event loop
+                logger.info("API Startup: Processed data not found. Running the ranking pipeline...")
+                data_processor.run_full_pipeline()
+        if settings.PROCESSED_DATA_PATH.exists():
+            _load_ranked(scorer.default_top_n) # Warm the cache for the first request
         logger.info("API Startup: Resources loaded successfully.")
     except Exception as e:
         logger.critical(f"Error loading resources on startup: {e}", exc_info=True)
 
-@app.get("/ranked-products/", response_model=List[ProductRankedResponse])
+def _build_ranked_records(ranked_df: pd.DataFrame) -> List[Dict[str, Any]]:
+    # Rows are serialized as-is, keyed like ProductRankedResponse's aliases: types are already
+    # coerced by the ranking pipeline or by PROCESSED_DTYPES when the processed CSV is read back.
+    return [dict(zip(RANKED_COLUMNS, row)) for row in ranked_df[RANKED_COLUMNS].itertuples(index=False, name=None)]
+
+def _json_response(content: bytes) -> Response:
+    return Response(content=content, media_type="application/json")
+
+# The _load_* helpers below block on disk and CPU; endpoints run them in a worker thread
+# via anyio.to_thread.run_sync so the event loop keeps serving other requests.
+def _load_ranked(top_n: int) -> bytes:
+    mtime = settings.PROCESSED_DATA_PATH.stat().st_mtime
+    with _ranked_cache_lock: # Held throughout so records and their blobs always belong to one reload
+        if _ranked_cache["mtime"] != mtime:
+            logger.info(f"API: Loading pre-processed data from {settings.PROCESSED_DATA_PATH} into cache.")
+            ranked_df = pd.read_csv(settings.PROCESSED_DATA_PATH, dtype=PROCESSED_DTYPES)
+            if 'rank' not in ranked_df.columns:
+                logger.warning(f"Processed data missing 'rank'. Re-creating.")
+                ranked_df['rank'] = range(1, len(ranked_df) + 1)
+            _ranked_cache["records"] = _build_ranked_records(ranked_df)
+            _ranked_cache["json_by_top_n"] = {}
+            _ranked_cache["mtime"] = mtime
+
+        records = _ranked_cache["records"]
+        if not records:
+            logger.info("API: No products available in processed data.")
+        # Keyed by slice length, so any top_n (negative or past the end) maps onto at most
+        # len(records) + 1 entries
+        key = len(records[:top_n])
+        if key not in _ranked_cache["json_by_top_n"]:
+            _ranked_cache["json_by_top_n"][key] = orjson.dumps(records[:top_n])
+        return _ranked_cache["json_by_top_n"][key]
+
+def _validate_product_details(record: Dict[str, Any]) -> Optional[ProductDetailResponse]:
+    try:
+        return ProductDetailResponse.model_validate(record)
+    except ValidationError as e_val:
+        logger.error(f"Validation error for product details {record}: {e_val}")
+        return None
+
+def _load_product_index() -> Dict[str, Optional[ProductDetailResponse]]:
+    mtime = settings.RAW_DATA_PATH.stat().st_mtime
+    if _product_index_cache["mtime"] != mtime:
+        with _product_index_lock:
+            if _product_index_cache["mtime"] != mtime:
+                logger.info(f"API: Building product index from {settings.RAW_DATA_PATH}.")
+                df = data_processor.load_data(settings.RAW_DATA_PATH)
+                records = df.to_dict(orient="records")
+                products: List[Optional[ProductDetailResponse]]
+                try:
+                    # Whole catalogue in one call so validation stays inside pydantic-core
+                    products = _product_details_adapter.validate_python(records)
+                except ValidationError as e:
+                    logger.error(f"Bulk validation of product details failed with {e.error_count()} error(s). Validating per record.")
+                    products = [_validate_product_details(record) for record in records]
+                index: Dict[str, Optional[ProductDetailResponse]] = {}
+                for record, product in zip(records, products):
+                    index.setdefault(record["Product Name"], product) # First occurrence wins on duplicate names
+                _product_index_cache["index"] = index
+                _product_index_cache["mtime"] = mtime
+    return _product_index_cache["index"]
+
+def _lookup_product(product_name: str) -> ProductDetailResponse:
+    product_index = _load_product_index()
+    if not product_index:
+         logger.warning(f"API Warning: Raw data file loaded as empty.")
+         raise HTTPException(status_code=404, detail=f"Raw data file empty or not loaded.")
+
+    if product_name not in product_index:
+        logger.info(f"API: Product '{product_name}' not found.")
+        raise HTTPException(status_code=404, detail=f"Product '{product_name}' not found.")
+
+    product = product_index[product_name]
+    if product is None: # Record was present but failed validation when the index was built
+        raise HTTPException(status_code=500, detail="Internal server error during product detail validation.")
+    return product
+
+@app.get("/ranked-products/", response_class=Response, responses={200: {"model": List[ProductRankedResponse]}})
 async def get_ranked_products(top_n: int = 10):
     if not scorer or not data_processor:
         logger.error("API Error: Scoring service not available.")
         raise HTTPException(status_code=503, detail="Scoring service not available.")
 
     try:
-        ranked_df: Optional[pd.DataFrame] = None
         if settings.PROCESSED_DATA_PATH.exists():
-            logger.info(f"API: Loading pre-processed data from {settings.PROCESSED_DATA_PATH} for top_n={top_n}")
-            ranked_df = pd.read_csv(settings.PROCESSED_DATA_PATH)
-            if 'rank' not in ranked_df.columns:
-                logger.warning(f"Processed data missing 'rank'. Re-creating.")
-                ranked_df['rank'] = range(1, len(ranked_df) + 1)
-            if top_n < len(ranked_df):
-                 ranked_df = ranked_df.head(top_n)
-        else:
-            logger.warning(f"API: Processed data not found. Processing raw data on-the-fly...")
-            if not settings.RAW_DATA_PATH.exists():
-                 logger.error(f"API Error: Raw data file {settings.RAW_DATA_PATH} not found for on-the-fly processing.")
-                 raise HTTPException(status_code=404, detail=f"Raw data file {settings.RAW_DATA_PATH} not found.")
-            raw_df = data_processor.load_data()
-            if raw_df.empty:
-                logger.info("API: Raw data empty. Returning no ranked products.")
-                return []
-            ranked_df = scorer.process(raw_df, top_n=top_n)
-
-        if ranked_df is None or ranked_df.empty:
-            logger.info("API: No products available after processing/loading.")
-            return []
-
-        # --- MODIFICATION START ---
-        # Explicitly create Pydantic model instances
-        # This ensures that aliases are correctly used during instantiation.
-        product_responses: List[ProductRankedResponse] = []
-        for record in ranked_df.to_dict(orient="records"):
-            try:
-                # Pydantic V2 uses model_validate for dicts
-                product_responses.append(ProductRankedResponse.model_validate(record))
-            except Exception as e_val: # Catch Pydantic validation errors per record for debugging
-                logger.error(f"Validation error for record {record}: {e_val}")
-                # Decide how to handle: skip record, or raise overall error
-                # For now, let's see if any individual record fails
-        
-        if not product_responses and not ranked_df.empty: # If all records failed validation
-            logger.error("All records failed Pydantic validation for ProductRankedResponse.")
-            raise HTTPException(status_code=500, detail="Internal server error during data validation.")
-            
-        return product_responses
-        # --- MODIFICATION END ---
+            return _json_response(await anyio.to_thread.run_sync(_load_ranked, top_n))
+
+        # Processed data is produced at startup (or by the ranking pipeline); it is never rebuilt per request
+        if not settings.RAW_DATA_PATH.exists():
+             logger.error(f"API Error: Processed data and raw data file {settings.RAW_DATA_PATH} not found.")
+             raise HTTPException(status_code=404, detail=f"Raw data file {settings.RAW_DATA_PATH} not found.")
+        logger.error(f"API Error: Processed data {settings.PROCESSED_DATA_PATH} not found.")
+        raise HTTPException(status_code=503, detail="Ranked products not available yet. Run the ranking pipeline.")
 
+    except HTTPException:
+        raise
     except FileNotFoundError as e:
         logger.error(f"API Error in /ranked-products: FileNotFoundError - {e}", exc_info=True)
         raise HTTPException(status_code=404, detail=f"A required data file was not found: {e}.")
@@ -108,26 +174,10 @@ async def get_product_details(product_name: str):
         logger.error("API Error: Data service not available.")
         raise HTTPException(status_code=503, detail="Data service not available.")
     try:
-        df = data_processor.load_data(settings.RAW_DATA_PATH)
-        if df.empty:
-             logger.warning(f"API Warning: Raw data file loaded as empty.")
-             raise HTTPException(status_code=404, detail=f"Raw data file empty or not loaded.")
-
-        product_data_df = df[df['Product Name'] == product_name]
-
-        if product_data_df.empty:
-            logger.info(f"API: Product '{product_name}' not found.")
-            raise HTTPException(status_code=404, detail=f"Product '{product_name}' not found.")
-
-        product_dict = product_data_df.iloc[0].to_dict()
-        # For single dicts, Pydantic V2 usually handles **product_dict or model_validate(product_dict)
-        try:
-            return ProductDetailResponse.model_validate(product_dict)
-        except Exception as e_val:
-            logger.error(f"Validation error for product details {product_dict}: {e_val}")
-            raise HTTPException(status_code=500, detail="Internal server error during product detail validation.")
-
+        return await anyio.to_thread.run_sync(_lookup_product, product_name)
 
+    except HTTPException:
+        raise
     except FileNotFoundError:
         logger.error(f"API Error: Raw data file not found.", exc_info=True)
         raise HTTPException(status_code=404, detail=f"Raw data file not found.")
@@ -1,5 +1,7 @@
 import os
+import functools
 from pathlib import Path
+from typing import Any, Dict
 from dotenv import load_dotenv
 import yaml
 import logging # For logging issues during settings load
@@ -13,10 +15,13 @@ if not logger.handlers: # Avoid adding multiple handlers if reloaded
     logger.addHandler(handler)
 
 
+# Project root, resolved once here and shared by every module through settings.BASE_DIR and the paths below
 BASE_DIR = Path(__file__).resolve().parent.parent
 dotenv_path = BASE_DIR / ".env"
 load_dotenv(dotenv_path=dotenv_path)
 
+DEFAULT_WEIGHTS: Dict[str, Any] = {'scoring_weights': {}, 'brand_tier_weights': {}, 'filters': {}, 'top_n_products': 10}
+
 class Settings:
     BASE_DIR: Path = BASE_DIR
     DATA_DIR: Path = BASE_DIR / "data"
@@ -32,18 +37,29 @@ class Settings:
     
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
     API_PORT: int = int(os.getenv("API_PORT", 8000))
+
+    # Dataframe engine for DataProcessor.process_and_score_data: "pandas" (default) or "polars"
+    ENGINE: str = os.getenv("ENGINE", "pandas").lower()
     
     WEIGHTS_FILE_PATH: Path = CONFIG_DIR / "weights.yaml"
-    try:
-        with open(WEIGHTS_FILE_PATH, 'r') as f:
-            WEIGHTS = yaml.safe_load(f)
-        logger.info(f"Successfully loaded weights from {WEIGHTS_FILE_PATH}")
-    except FileNotFoundError:
-        logger.critical(f"Weights file not found at {WEIGHTS_FILE_PATH}. Using default empty weights. Scoring will be significantly affected.")
-        WEIGHTS = {'scoring_weights': {}, 'brand_tier_weights': {}, 'filters': {}, 'top_n_products': 10}
-    except yaml.YAMLError as e:
-        logger.critical(f"Error parsing weights file {WEIGHTS_FILE_PATH}: {e}. Using default empty weights. Scoring will be significantly affected.")
-        WEIGHTS = {'scoring_weights': {}, 'brand_tier_weights': {}, 'filters': {}, 'top_n_products': 10}
+
+    @functools.cached_property
+    def WEIGHTS(self) -> Dict[str, Any]:
+        """Parses the weights YAML on first access; later accesses return the cached dict until reload_weights()."""
+        try:
+            with open(self.WEIGHTS_FILE_PATH, 'r') as f:
+                weights = yaml.safe_load(f)
+            logger.info(f"Successfully loaded weights from {self.WEIGHTS_FILE_PATH}")
+            return weights
+        except FileNotFoundError:
+            logger.critical(f"Weights file not found at {self.WEIGHTS_FILE_PATH}. Using default empty weights. Scoring will be significantly affected.")
+        except yaml.YAMLError as e:
+            logger.critical(f"Error parsing weights file {self.WEIGHTS_FILE_PATH}: {e}. Using default empty weights. Scoring will be significantly affected.")
+        return dict(DEFAULT_WEIGHTS)
+
+    def reload_weights(self) -> None:
+        """Drops the cached weights so the next WEIGHTS access re-reads the YAML file."""
+        self.__dict__.pop('WEIGHTS', None)
 
 settings = Settings()
 try:
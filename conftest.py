@@ -0,0 +1,8 @@
+import pytest
+
+
+def pytest_collection_modifyitems(config, items):
+    # With --dist loadgroup, every test in the same xdist_group runs on one worker, one after another
+    for item in items:
+        if item.get_closest_marker("serial"):
+            item.add_marker(pytest.mark.xdist_group("serial"))
\ No newline at end of file
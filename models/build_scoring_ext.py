@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Precompiles the numba scoring kernel into models/scoring_ext, a plain C extension.
+Scripts started from cron then skip the JIT compile on their first scoring call;
+models.scoring_kernel picks the extension up automatically and falls back to @njit without it.
+Rebuild after changing _score_kernel:  python -m models.build_scoring_ext
+"""
+import logging
+import sys
+from pathlib import Path
+
+from numba.pycc import CC
+
+from models import scoring_kernel
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    cc = CC('scoring_ext')
+    cc.output_dir = str(Path(scoring_kernel.__file__).parent)
+    cc.export('score_kernel', scoring_kernel.SCORE_KERNEL_SIGNATURE)(scoring_kernel._score_kernel)
+    # Compiled in as a constant; models.scoring_kernel ignores the extension once its source no longer matches
+    source_hash = scoring_kernel.KERNEL_SOURCE_HASH
+    cc.export('kernel_hash', 'i8()')(lambda: source_hash)
+    logger.info("Compiling scoring kernel extension into %s...", cc.output_dir)
+    try:
+        cc.compile()
+    except Exception as e:
+        logger.error("Failed to build the scoring kernel extension: %s", e, exc_info=True)
+        sys.exit(1)
+    logger.info("Scoring kernel extension built.")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
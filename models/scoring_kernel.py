@@ -0,0 +1,131 @@
+import hashlib
+import inspect
+import logging
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError: # Optional: ProductScorer falls back to its NumPy stages without numba
+    NUMBA_AVAILABLE = False
+
+try:
+    from models import scoring_ext # Ahead-of-time build of _score_kernel, see models/build_scoring_ext.py
+except ImportError:
+    scoring_ext = None
+
+logger = logging.getLogger("scoring_kernel_logger")
+
+# Exported signature of the AOT build, matching ProductSoA's column dtypes
+SCORE_KERNEL_SIGNATURE = 'f8[:](f8[:], f8[:], i4[:], i4[:], f4[:], i4[:], i4[:], b1, f8, b1, f8, f8[:])'
+
+# fastmath=True minus 'nnan'/'ninf': the kernel writes NaN sentinels and seeds its bounds with
+# +-inf, so LLVM must not assume those values never occur
+FASTMATH_FLAGS = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+
+def _score_kernel(price, cogs, volume, views, brand_tier_w, units, days,
+                  apply_min_stock, min_stock, apply_max_days, max_days, weights):
+    """
+    Fused filter + feature + min-max normalization + weighted-sum passes over flat arrays.
+    Compiled without parallel=True: numba's default workqueue threading layer hangs the
+    interpreter at exit when first launched from a worker thread (API threadpool, Prefect).
+    Mirrors ProductScorer's NumPy stages: returns one score per row, with NaN as the
+    sentinel for rows dropped by the filters.
+    `weights` is ordered like SCORE_COMPONENTS: sales_velocity, profit_margin, engagement, brand_tier.
+    """
+    n = price.shape[0]
+    mask = np.empty(n, dtype=np.bool_)
+    margin = np.empty(n, dtype=np.float32)
+    for i in range(n):
+        keep = True
+        if apply_min_stock and units[i] < min_stock:
+            keep = False
+        if apply_max_days and days[i] > max_days:
+            keep = False
+        mask[i] = keep
+        margin[i] = (price[i] - cogs[i]) / price[i] if price[i] > 0 else 0.0
+
+    # Min-max normalization and the weights fold into one coefficient per feature plus a shared
+    # bias, so each row's score has no per-row division or branching. Offsets are subtracted per
+    # row rather than folded into the bias: a feature at its minimum then contributes exactly 0.0,
+    # so scores stay within [0, 1] like normalize_features' instead of drifting below zero.
+    bounds = _feature_bounds(volume, margin, views, brand_tier_w, mask)
+    coef = np.zeros(4, dtype=np.float64)
+    lo = bounds[0].copy()
+    bias = 0.0
+    for k in range(4):
+        hi = bounds[1, k]
+        if hi > lo[k]:
+            coef[k] = weights[k] / (hi - lo[k])
+        else:
+            lo[k] = 0.0 # coef is 0 here, so only keep the offset finite (it is inf with no rows)
+            if hi != 0: # Constant features become 1.0 (or 0.0 when the constant is zero), matching normalize_features
+                bias += weights[k]
+
+    scores = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        if not mask[i]:
+            scores[i] = np.nan
+        else:
+            scores[i] = (bias + coef[0] * (volume[i] - lo[0]) + coef[1] * (margin[i] - lo[1])
+                         + coef[2] * (views[i] - lo[2]) + coef[3] * (brand_tier_w[i] - lo[3]))
+    return scores
+
+
+def _feature_bounds(volume, margin, views, brand_tier_w, mask):
+    """
+    (min, max) of every feature over the rows passing `mask` in a single scan, as a 2 x 4
+    array ordered like SCORE_COMPONENTS; normalize_features sees only the filtered rows too.
+    """
+    bounds = np.empty((2, 4), dtype=np.float64)
+    bounds[0, :] = np.inf
+    bounds[1, :] = -np.inf
+    for i in range(volume.shape[0]):
+        if mask[i]:
+            bounds[0, 0] = min(bounds[0, 0], volume[i]); bounds[1, 0] = max(bounds[1, 0], volume[i])
+            bounds[0, 1] = min(bounds[0, 1], margin[i]); bounds[1, 1] = max(bounds[1, 1], margin[i])
+            bounds[0, 2] = min(bounds[0, 2], views[i]); bounds[1, 2] = max(bounds[1, 2], views[i])
+            bounds[0, 3] = min(bounds[0, 3], brand_tier_w[i]); bounds[1, 3] = max(bounds[1, 3], brand_tier_w[i])
+    return bounds
+
+
+def _score_kernel_aot(price, cogs, volume, views, brand_tier_w, units, days,
+                      apply_min_stock, min_stock, apply_max_days, max_days, weights):
+    # The AOT build has no dispatcher to check argument types, so coerce to its signature
+    # here instead of risking a crash; this is a no-op for ProductSoA columns.
+    return scoring_ext.score_kernel(
+        np.asarray(price, np.float64), np.asarray(cogs, np.float64),
+        np.asarray(volume, np.int32), np.asarray(views, np.int32), np.asarray(brand_tier_w, np.float32),
+        np.asarray(units, np.int32), np.asarray(days, np.int32),
+        bool(apply_min_stock), float(min_stock), bool(apply_max_days), float(max_days),
+        np.asarray(weights, np.float64)
+    )
+
+
+def _kernel_source_hash() -> int:
+    """
+    Fingerprint of the kernel source and AOT signature, exported into scoring_ext by the build so a
+    stale extension is detected at import. 56 bits, so it fits the extension's int64 return type.
+    """
+    source = "".join(inspect.getsource(f) for f in (_score_kernel, _feature_bounds)) + SCORE_KERNEL_SIGNATURE
+    return int.from_bytes(hashlib.sha256(source.encode()).digest()[:7], 'big')
+
+
+KERNEL_SOURCE_HASH = _kernel_source_hash()
+
+if scoring_ext is not None and getattr(scoring_ext, 'kernel_hash', lambda: None)() != KERNEL_SOURCE_HASH:
+    logger.warning("models/scoring_ext was built from a different scoring kernel; ignoring it. "
+                   "Rebuild it with `python -m models.build_scoring_ext`.")
+    scoring_ext = None
+
+if NUMBA_AVAILABLE:
+    _feature_bounds = njit(inline='always')(_feature_bounds)
+
+# Prefer the precompiled extension: no JIT compile or cache load on a process's first call
+if scoring_ext is not None:
+    score_kernel = _score_kernel_aot
+elif NUMBA_AVAILABLE:
+    score_kernel = njit(fastmath=FASTMATH_FLAGS, cache=True)(_score_kernel)
+else:
+    score_kernel = None
@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Optional
+from dataclasses import dataclass, fields
+from typing import Dict, Any, Optional, Tuple
 import logging # For internal logging
+from models.scoring_kernel import score_kernel
 
 logger = logging.getLogger("scoring_model_logger") # Specific logger
 logger.setLevel(logging.INFO) # Or logging.DEBUG for more verbosity
@@ -11,6 +13,34 @@ handler.setFormatter(formatter)
 if not logger.handlers:
     logger.addHandler(handler)
 
+# Scoring components in feature/score-matrix column order.
+SCORE_COMPONENTS = ['sales_velocity', 'profit_margin', 'engagement', 'brand_tier']
+OUTPUT_COLUMNS = ['Product Name', 'Brand', 'Price (USD)', 'score', 'rank']
+# Scores are ranked on this many decimals. The scoring paths (kernel, NumPy stages, Polars) round their
+# float32 features differently, so equal scores can differ by ~1e-8; on the rounded keys they tie
+# and every path breaks the tie by row order.
+SCORE_TIE_DECIMALS = 6
+
+@dataclass(frozen=True)
+class ProductSoA:
+    """Structure-of-arrays view of the catalogue passed between ProductScorer stages."""
+    product_name: np.ndarray
+    brand: np.ndarray
+    price: np.ndarray        # float64
+    cogs: np.ndarray         # float64
+    units: np.ndarray        # int32
+    days: np.ndarray         # int32
+    views: np.ndarray        # int32
+    volume: np.ndarray       # int32
+    brand_tier_w: np.ndarray # float32
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def take(self, rows: np.ndarray) -> "ProductSoA":
+        """Returns a new ProductSoA holding only `rows` (a boolean mask or an index array)."""
+        return ProductSoA(**{f.name: getattr(self, f.name)[rows] for f in fields(self)})
+
 
 class ProductScorer:
     def __init__(self, weights_config: Dict[str, Any]):
@@ -19,131 +49,162 @@ class ProductScorer:
         self.brand_tier_map = weights_config.get('brand_tier_weights', {})
         self.filters = weights_config.get('filters', {})
         self.default_top_n = weights_config.get('top_n_products', 10)
+        for component in self.scoring_weights:
+            if component not in SCORE_COMPONENTS:
+                logger.warning(f"Unknown scoring component '{component}' in weights config; it will be ignored.")
+        self._score_weight_vector = np.array([self.scoring_weights.get(c, 0.0) for c in SCORE_COMPONENTS], dtype=np.float64)
+        # Brand tier lookup table: category codes index straight into _tier_weights
+        self._tier_categories = pd.Index(list(self.brand_tier_map.keys()))
+        self._tier_weights = np.array([self.brand_tier_map[k] for k in self._tier_categories], dtype=np.float32)
+        self.use_kernel = score_kernel is not None # Fused numba path; the NumPy stages are the fallback
         logger.debug(f"ProductScorer initialized. Default top_n: {self.default_top_n}, Filters: {self.filters}, Scoring Weights: {self.scoring_weights}")
 
     def _to_numeric_robust(self, series: pd.Series, default_on_error=0) -> pd.Series:
         if pd.api.types.is_numeric_dtype(series):
-            return series.fillna(default_on_error) # Fill NaNs if already numeric
+            return series.fillna(default_on_error) if series.hasnans else series # Fill NaNs if already numeric
         # Attempt conversion for non-numeric series
         numeric_series = pd.to_numeric(series.astype(str).str.replace(',', '', regex=False), errors='coerce')
         return numeric_series.fillna(default_on_error)
 
 
-    def preprocess_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        processed_df = df.copy()
+    def preprocess_data(self, df: pd.DataFrame) -> ProductSoA:
+        # Numeric columns are coerced exactly once here; every later stage works on the resulting arrays.
         column_map = {
-            'Price (USD)': 'price_usd', 'COGS (USD)': 'cogs_usd',
-            'Units in Stock': 'units_in_stock', 'Days of Inventory': 'days_of_inventory',
-            'Views Last Month': 'views_last_month', 'Volume Sold Last Month': 'volume_sold_last_month',
-            'Brand Tier': 'brand_tier', 'Product Name': 'Product Name', 'Brand': 'Brand'
+            'Price (USD)': 'price', 'COGS (USD)': 'cogs',
+            'Units in Stock': 'units', 'Days of Inventory': 'days',
+            'Views Last Month': 'views', 'Volume Sold Last Month': 'volume',
+            'Product Name': 'product_name', 'Brand': 'brand'
+        }
+        # Counts fit comfortably in int32; prices stay float64 because they are echoed back in the output.
+        numeric_field_dtypes = {
+            'price': np.float64, 'cogs': np.float64, 'units': np.int32,
+            'days': np.int32, 'views': np.int32, 'volume': np.int32
         }
-        numeric_internal_cols = ['price_usd', 'cogs_usd', 'units_in_stock', 'days_of_inventory', 'views_last_month', 'volume_sold_last_month']
-
-        for csv_col, internal_col in column_map.items():
-            if csv_col in processed_df.columns:
-                if internal_col in numeric_internal_cols:
-                    processed_df[internal_col] = self._to_numeric_robust(processed_df[csv_col])
-                elif internal_col != csv_col:
-                     processed_df[internal_col] = processed_df[csv_col]
-                # else: string columns like Brand Tier are handled if names match
-            else:
-                logger.warning(f"Expected CSV column '{csv_col}' not found. Defaulting internal column '{internal_col}'.")
-                if internal_col in numeric_internal_cols: processed_df[internal_col] = 0
-                else: processed_df[internal_col] = None
-        return processed_df
 
-    def apply_filters(self, df: pd.DataFrame) -> pd.DataFrame:
-        filtered_df = df.copy()
+        arrays: Dict[str, np.ndarray] = {}
+        for csv_col, field_name in column_map.items():
+            if csv_col in df.columns:
+                if field_name in numeric_field_dtypes:
+                    arrays[field_name] = self._to_numeric_robust(df[csv_col]).to_numpy(dtype=numeric_field_dtypes[field_name])
+                else:
+                    arrays[field_name] = df[csv_col].to_numpy(dtype=object)
+            else:
+                logger.warning(f"Expected CSV column '{csv_col}' not found. Defaulting internal column '{field_name}'.")
+                if field_name in numeric_field_dtypes: arrays[field_name] = np.zeros(len(df), dtype=numeric_field_dtypes[field_name])
+                else: arrays[field_name] = np.full(len(df), None, dtype=object)
+        arrays['brand_tier_w'] = self._brand_tier_weights(df)
+        return ProductSoA(**arrays)
+
+    def _brand_tier_weights(self, df: pd.DataFrame) -> np.ndarray:
+        if 'Brand Tier' in df.columns and self.brand_tier_map:
+            # Unknown or missing tiers get code -1 and a weight of 0
+            codes = self._tier_categories.get_indexer(df['Brand Tier'])
+            return np.where(codes >= 0, self._tier_weights[codes], 0.0).astype(np.float32)
+        if 'Brand Tier' not in df.columns:
+            logger.warning("Expected CSV column 'Brand Tier' not found. Defaulting brand tier weights to 0.")
+        return np.zeros(len(df), dtype=np.float32)
+
+    def apply_filters(self, soa: ProductSoA) -> ProductSoA:
         min_stock = self.filters.get('min_stock')
         max_days = self.filters.get('max_inventory_days')
 
-        if min_stock is not None and 'units_in_stock' in filtered_df.columns:
-            units = self._to_numeric_robust(filtered_df['units_in_stock'])
-            filtered_df = filtered_df[units >= min_stock]
-        
-        if max_days is not None and 'days_of_inventory' in filtered_df.columns:
-            days = self._to_numeric_robust(filtered_df['days_of_inventory'], default_on_error=np.inf) # NaN days won't pass filter
-            filtered_df = filtered_df[days <= max_days]
-            
-        logger.debug(f"Applied filters. Original rows: {len(df)}, Filtered rows: {len(filtered_df)}")
-        return filtered_df.reset_index(drop=True)
-
-    def calculate_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        f_df = df.copy()
-        
-        price = self._to_numeric_robust(f_df.get('price_usd', pd.Series(dtype='float64')))
-        cogs = self._to_numeric_robust(f_df.get('cogs_usd', pd.Series(dtype='float64')))
-        profit_margin_array = np.where(price > 0, (price - cogs) / price, 0)
-        f_df['profit_margin'] = pd.Series(profit_margin_array, index=f_df.index).fillna(0)
-
-        f_df['sales_velocity'] = self._to_numeric_robust(f_df.get('volume_sold_last_month', pd.Series(dtype='float64')))
-        f_df['engagement'] = self._to_numeric_robust(f_df.get('views_last_month', pd.Series(dtype='float64')))
-        
-        if 'brand_tier' in f_df.columns and self.brand_tier_map:
-            f_df['brand_tier_weight'] = f_df['brand_tier'].map(self.brand_tier_map).fillna(0)
-        else: f_df['brand_tier_weight'] = 0
-        return f_df
-
-    def normalize_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        norm_df = df.copy()
-        features_to_normalize = ['sales_velocity', 'profit_margin', 'engagement', 'brand_tier_weight']
-        
-        for feature in features_to_normalize:
-            if feature in norm_df.columns and not norm_df[feature].empty:
-                series = self._to_numeric_robust(norm_df[feature])
-                min_v, max_v = series.min(), series.max()
-                if max_v > min_v: norm_df[f'norm_{feature}'] = (series - min_v) / (max_v - min_v)
-                elif max_v == min_v and max_v != 0: norm_df[f'norm_{feature}'] = 1.0
-                else: norm_df[f'norm_{feature}'] = 0.0
-            else: norm_df[f'norm_{feature}'] = 0.0
-        return norm_df
-
-    def calculate_scores(self, df: pd.DataFrame) -> pd.DataFrame:
-        score_df = df.copy()
-        score_df['score'] = 0.0
-        for component, weight in self.scoring_weights.items():
-            norm_col = f'norm_{"brand_tier_weight" if component == "brand_tier" else component}'
-            if norm_col in score_df.columns:
-                values = self._to_numeric_robust(score_df[norm_col])
-                score_df['score'] += weight * values
-            else: logger.warning(f"Normalized component '{norm_col}' for scoring (weight='{component}') not found.")
-        return score_df
-
-    def rank_products(self, df: pd.DataFrame, top_n: int) -> pd.DataFrame:
-        df['score'] = self._to_numeric_robust(df.get('score', pd.Series(dtype='float64')))
-        ranked = df.sort_values('score', ascending=False).reset_index(drop=True)
-        ranked['rank'] = range(1, len(ranked) + 1)
-        return ranked.head(top_n)
+        mask = np.ones(len(soa), dtype=bool)
+        if min_stock is not None:
+            mask &= soa.units >= min_stock
+        if max_days is not None:
+            mask &= soa.days <= max_days
+
+        filtered = soa.take(mask)
+        logger.debug(f"Applied filters. Original rows: {len(soa)}, Filtered rows: {len(filtered)}")
+        return filtered
+
+    def calculate_features(self, soa: ProductSoA) -> np.ndarray:
+        """Returns the raw (n_rows, n_components) feature matrix, columns ordered like SCORE_COMPONENTS."""
+        # Prices are already NaN-free float64 arrays, so a masked divide is all the margin needs
+        profit_margin = np.zeros(len(soa), dtype=np.float64)
+        np.divide(soa.price - soa.cogs, soa.price, out=profit_margin, where=soa.price > 0)
+        # Scoring features are float32: half the bytes of float64 per pass, ample precision for min-max scores.
+        # Filled column by column to skip column_stack's float64 intermediate.
+        features = np.empty((len(soa), len(SCORE_COMPONENTS)), dtype=np.float32)
+        for col, values in enumerate((soa.volume, profit_margin, soa.views, soa.brand_tier_w)):
+            features[:, col] = values
+        return features
+
+    def normalize_features(self, features: np.ndarray) -> np.ndarray:
+        if features.shape[0] == 0:
+            return features.astype(np.float32)
+        # Min-max normalize every feature at once; constant features become 1.0 (or 0.0 when the constant is zero).
+        min_v, max_v = features.min(axis=0), features.max(axis=0)
+        spread = max_v - min_v
+        return np.where(
+            spread > 0, (features - min_v) / np.where(spread > 0, spread, 1), np.where(max_v != 0, 1.0, 0.0)
+        ).astype(np.float32)
+
+    def calculate_scores(self, normalized_features: np.ndarray) -> np.ndarray:
+        # One (n_rows, n_components) @ (n_components,) product instead of a Series update per component
+        return normalized_features.astype(np.float64) @ self._score_weight_vector
+
+    def score_with_kernel(self, soa: ProductSoA) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Equivalent of apply_filters -> calculate_features -> normalize_features -> calculate_scores in one numba pass.
+        Returns (rows, scores): the indices into `soa` of the rows that passed the filters, and their scores.
+        """
+        min_stock = self.filters.get('min_stock')
+        max_days = self.filters.get('max_inventory_days')
+        scores = score_kernel(
+            soa.price, soa.cogs, soa.volume, soa.views, soa.brand_tier_w, soa.units, soa.days,
+            min_stock is not None, float(min_stock or 0), max_days is not None, float(max_days or 0),
+            self._score_weight_vector
+        )
+        rows = np.flatnonzero(~np.isnan(scores)) # NaN marks rows dropped by the filters
+        logger.debug(f"Kernel scoring. Original rows: {len(soa)}, Filtered rows: {len(rows)}")
+        return rows, scores[rows]
+
+    def rank_products(self, scores: np.ndarray, top_n: int) -> np.ndarray:
+        """Returns the row indices of the top_n scores, best first; ties (at SCORE_TIE_DECIMALS) keep row order."""
+        keys = np.round(scores, SCORE_TIE_DECIMALS)
+        if 0 < top_n < len(keys) // 4:
+            # Partition out the top_n scores in O(n) and only sort those, instead of every row.
+            # For larger top_n the partition pass costs more than it saves over one full sort.
+            # Every row tied with the cutoff score is kept, ascending by index, so the stable sort
+            # breaks ties by row order exactly as the full sort below does.
+            cutoff = -np.partition(-keys, top_n - 1)[top_n - 1]
+            candidates = np.flatnonzero(keys >= cutoff)
+            return candidates[np.argsort(-keys[candidates], kind='stable')][:top_n]
+        return np.argsort(-keys, kind='stable')[:top_n]
 
     def process(self, df: pd.DataFrame, top_n: Optional[int] = None) -> pd.DataFrame:
         effective_top_n = top_n if top_n is not None else self.default_top_n
         logger.info(f"Scorer processing {len(df)} products for top_n={effective_top_n}...")
-        
-        out_cols = ['Product Name', 'Brand', 'Price (USD)', 'score', 'rank']
+
         if df.empty:
             logger.info("Scorer: Input DataFrame is empty.")
-            return pd.DataFrame(columns=out_cols)
-
-        x = self.preprocess_data(df)
-        x = self.calculate_features(x)
-        x = self.apply_filters(x)
-        
-        if x.empty:
+            return pd.DataFrame(columns=OUTPUT_COLUMNS)
+
+        soa = self.preprocess_data(df)
+        if self.use_kernel:
+            # Surviving rows are only gathered once, already in rank order
+            rows, scores = self.score_with_kernel(soa)
+        else:
+            soa = self.apply_filters(soa) # Filter on the raw numeric columns first so dropped rows skip feature work
+            rows = np.arange(len(soa))
+            scores = self.calculate_scores(self.normalize_features(self.calculate_features(soa))) if len(soa) else None
+
+        if len(rows) == 0:
             logger.info("Scorer: DataFrame is empty after filtering.")
-            return pd.DataFrame(columns=out_cols)
+            return pd.DataFrame(columns=OUTPUT_COLUMNS)
 
-        x = self.normalize_features(x)
-        x = self.calculate_scores(x)
-        ranked = self.rank_products(x, top_n=effective_top_n)
+        order = self.rank_products(scores, top_n=effective_top_n)
+        ranked = soa.take(rows[order])
         
-        # Prepare final output with specified column names
-        final_output_df = pd.DataFrame()
-        # Map internal names back to CSV-like names for processed output consistency
-        final_output_df['Product Name'] = ranked.get('Product Name', pd.Series(dtype=str))
-        final_output_df['Brand'] = ranked.get('Brand', pd.Series(dtype=str))
-        final_output_df['Price (USD)'] = ranked.get('price_usd', pd.Series(dtype=float)) # from internal 'price_usd'
-        final_output_df['score'] = ranked.get('score', pd.Series(dtype=float))
-        final_output_df['rank'] = ranked.get('rank', pd.Series(dtype=int))
+        # The output DataFrame is only materialized here, with CSV-like column names
+        final_output_df = pd.DataFrame({
+            'Product Name': ranked.product_name,
+            'Brand': ranked.brand,
+            'Price (USD)': ranked.price,
+            'score': scores[order],
+            'rank': np.arange(1, len(order) + 1)
+        }, columns=OUTPUT_COLUMNS)
         
         logger.info(f"Scorer processed {len(ranked)} products.")
-        return final_output_df[out_cols] # Ensure order and presence of columns
\ No newline at end of file
+        return final_output_df
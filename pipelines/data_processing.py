@@ -1,10 +1,22 @@
 import pandas as pd
 from typing import Optional
 from pathlib import Path
-from models.scoring_model import ProductScorer
+from models.scoring_model import ProductScorer, SCORE_COMPONENTS, OUTPUT_COLUMNS, SCORE_TIE_DECIMALS
 from config.settings import settings
 import logging
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError: # Optional: pandas' own CSV parser and writer are used without pyarrow
+    pa = pacsv = pq = None
+
+try:
+    import polars as pl
+except ImportError: # Optional: only used when settings.ENGINE == "polars"
+    pl = None
+
 logger = logging.getLogger("data_processor_logger")
 logger.setLevel(logging.INFO)
 handler = logging.StreamHandler()
@@ -13,9 +25,27 @@ handler.setFormatter(formatter)
 if not logger.handlers:
     logger.addHandler(handler)
 
+# Explicit dtypes for the raw catalogue so the pyarrow parser skips type inference.
+# Prices stay float64 so API responses return the exact catalogue values.
+# These are also the only columns read: anything else in an export is never parsed.
+RAW_DTYPES = {
+    "Product Name": "string", "Brand": "string", "Brand Tier": "category",
+    "Price (USD)": "float64", "COGS (USD)": "float64",
+    "Units in Stock": "int32", "Days of Inventory": "int32",
+    "Views Last Month": "int32", "Volume Sold Last Month": "int32"
+}
+# Arrow equivalents of RAW_DTYPES for pyarrow.csv; Brand Tier is dictionary-encoded and becomes a category.
+RAW_ARROW_TYPES = {
+    "Product Name": pa.string(), "Brand": pa.string(), "Brand Tier": pa.dictionary(pa.int32(), pa.string()),
+    "Price (USD)": pa.float64(), "COGS (USD)": pa.float64(),
+    "Units in Stock": pa.int32(), "Days of Inventory": pa.int32(),
+    "Views Last Month": pa.int32(), "Volume Sold Last Month": pa.int32()
+} if pa is not None else {}
+CSV_BLOCK_SIZE = 8 << 20 # Bytes per block handed to each pyarrow parsing thread
+
 class DataProcessor:
-    def __init__(self):
-        self.scorer = ProductScorer(settings.WEIGHTS)
+    def __init__(self, scorer: Optional[ProductScorer] = None):
+        self.scorer = scorer if scorer is not None else ProductScorer(settings.WEIGHTS)
         logger.debug("DataProcessor initialized.")
         
     def load_data(self, file_path: Optional[Path] = None) -> pd.DataFrame:
@@ -25,23 +55,119 @@ class DataProcessor:
             raise FileNotFoundError(f"Raw data file not found: {f_path}")
         try:
             logger.info(f"Loading data from {f_path}...")
-            df = pd.read_csv(f_path)
+            if f_path.suffix == ".parquet":
+                df = pd.read_parquet(f_path)
+                df = df[[col for col in df.columns if col in RAW_DTYPES]]
+            elif pacsv is not None:
+                try:
+                    df = self._read_csv_arrow(f_path)
+                except (ValueError, KeyError) as e:
+                    # Dirty values (e.g. "1,000") can't be cast up front, and missing columns can't be selected;
+                    # let the scorer coerce or default them instead.
+                    logger.warning(f"Typed CSV read failed for {f_path} ({e}). Falling back to dtype inference.")
+                    df = pd.read_csv(f_path, usecols=lambda col: col in RAW_DTYPES)
+            else:
+                df = pd.read_csv(f_path, usecols=lambda col: col in RAW_DTYPES)
             logger.info(f"Successfully loaded {len(df)} rows from {f_path}.")
             return df
         except Exception as e:
             logger.error(f"Error loading data from {f_path}: {e}", exc_info=True)
             return pd.DataFrame() 
+
+    def _read_csv_arrow(self, f_path: Path) -> pd.DataFrame:
+        # Multi-threaded, typed parse straight into Arrow columns, converted to pandas once at the end
+        table = pacsv.read_csv(
+            f_path,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=CSV_BLOCK_SIZE),
+            convert_options=pacsv.ConvertOptions(column_types=RAW_ARROW_TYPES, include_columns=list(RAW_ARROW_TYPES))
+        )
+        return table.to_pandas()
     
     def process_and_score_data(self, df: pd.DataFrame, top_n: Optional[int] = None) -> pd.DataFrame:
         effective_top_n = top_n if top_n is not None else settings.WEIGHTS.get('top_n_products', 10)
         logger.info(f"DataProcessor: Processing and scoring data for top_n={effective_top_n} products...")
+        if df.empty:
+            return self.scorer.process(df, top_n=effective_top_n)
+        if settings.ENGINE == "polars":
+            if pl is not None:
+                return self._process_polars(df, effective_top_n)
+            logger.warning("ENGINE is 'polars' but polars is not installed. Falling back to pandas.")
         return self.scorer.process(df, top_n=effective_top_n)
-    
-    def save_processed_data(self, df: pd.DataFrame, file_path: Optional[Path] = None) -> None:
+
+    def _process_polars(self, df: pd.DataFrame, top_n: int) -> pd.DataFrame:
+        """Polars equivalent of ProductScorer.process: filter, score and sort run as one lazy query plan."""
+        frame = pl.from_pandas(df)
+
+        def numeric(col: str) -> "pl.Expr":
+            # Same coercion as ProductScorer._to_numeric_robust: strip thousands separators, bad values become 0
+            if col not in frame.columns:
+                logger.warning(f"Expected CSV column '{col}' not found. Defaulting it to 0.")
+                return pl.lit(0.0)
+            expr = pl.col(col)
+            if not frame.schema[col].is_numeric():
+                expr = expr.cast(pl.Utf8).str.replace_all(",", "", literal=True).cast(pl.Float64, strict=False)
+            return expr.cast(pl.Float64).fill_nan(0).fill_null(0)
+
+        def text(col: str) -> "pl.Expr":
+            return pl.col(col) if col in frame.columns else pl.lit(None, dtype=pl.Utf8)
+
+        price, cogs = numeric('Price (USD)'), numeric('COGS (USD)')
+        if 'Brand Tier' in frame.columns and self.scorer.brand_tier_map:
+            brand_tier = pl.col('Brand Tier').cast(pl.Utf8).replace_strict(
+                self.scorer.brand_tier_map, default=0.0, return_dtype=pl.Float64)
+        else:
+            brand_tier = pl.lit(0.0)
+        # Features are float32 like ProductScorer.calculate_features, so both engines normalize identically
+        features = {
+            'sales_velocity': numeric('Volume Sold Last Month'),
+            'profit_margin': pl.when(price > 0).then((price - cogs) / price).otherwise(0.0),
+            'engagement': numeric('Views Last Month'),
+            'brand_tier': brand_tier,
+        }
+
+        plan = frame.lazy().select(
+            text('Product Name').alias('Product Name'), text('Brand').alias('Brand'), price.alias('Price (USD)'),
+            numeric('Units in Stock').alias('_units'), numeric('Days of Inventory').alias('_days'),
+            *(expr.cast(pl.Float32).alias(name) for name, expr in features.items())
+        )
+        min_stock = self.scorer.filters.get('min_stock')
+        max_days = self.scorer.filters.get('max_inventory_days')
+        if min_stock is not None:
+            plan = plan.filter(pl.col('_units') >= min_stock)
+        if max_days is not None:
+            plan = plan.filter(pl.col('_days') <= max_days)
+
+        def normalized(name: str) -> "pl.Expr":
+            # Min-max over the filtered rows; constant features become 1.0 (or 0.0 when the constant is zero)
+            col, lo, hi = pl.col(name), pl.col(name).min(), pl.col(name).max()
+            return pl.when(hi > lo).then((col - lo) / (hi - lo)).when(hi != 0).then(1.0).otherwise(0.0)
+
+        score = pl.sum_horizontal(
+            [pl.lit(float(self.scorer.scoring_weights.get(name, 0.0))) * normalized(name).cast(pl.Float64) for name in SCORE_COMPONENTS]
+        )
+        # Sorted on the same rounded keys as ProductScorer.rank_products, so ties keep row order in both engines
+        ranked = plan.with_columns(score=score).sort(
+            pl.col('score').round(SCORE_TIE_DECIMALS), descending=True, maintain_order=True
+        ).collect()
+        ranked = ranked.head(top_n) # Eager head: also accepts negative top_n like the pandas path's slicing
+        ranked = ranked.with_columns(rank=pl.int_range(1, pl.len() + 1))
+        logger.info(f"Polars engine processed {len(ranked)} products.")
+        return ranked.select(OUTPUT_COLUMNS).to_pandas()
+
+    def save_processed_data(self, df: pd.DataFrame, file_path: Optional[Path] = None, format: str = "csv") -> None:
+        """Writes `df` as CSV (the default, read by the API) or as zstd-compressed Parquet with format='parquet'."""
         f_path = file_path if file_path is not None else settings.PROCESSED_DATA_PATH
+        if format == "parquet" and file_path is None:
+            f_path = f_path.with_suffix(".parquet")
         try:
             f_path.parent.mkdir(parents=True, exist_ok=True)
-            df.to_csv(f_path, index=False)
+            if format == "parquet":
+                pq.write_table(pa.Table.from_pandas(df, preserve_index=False), f_path, compression="zstd")
+            elif pacsv is not None:
+                # Cells are formatted in C++ instead of per value in Python
+                pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), f_path)
+            else:
+                df.to_csv(f_path, index=False)
             logger.info(f"Processed data saved to {f_path} ({len(df)} rows).")
         except Exception as e:
             logger.error(f"Error saving processed data to {f_path}: {e}", exc_info=True)
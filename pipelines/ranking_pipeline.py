@@ -3,53 +3,44 @@ import pandas as pd
 from typing import Optional
 import logging # Using Prefect's built-in logging which is good
 
-# Adjust import paths based on project structure
-import sys
-from pathlib import Path
-project_root = Path(__file__).resolve().parent.parent
-sys.path.insert(0, str(project_root))
-
 from pipelines.data_processing import DataProcessor
 from config.settings import settings
 
+# Shared by every task in the flow so the scorer and its weights are only set up once per process.
+processor = DataProcessor()
+
 
-@task(name="Load Raw Product Data", log_prints=True)
-def load_raw_data_task() -> pd.DataFrame:
+def reload_processor() -> None:
+    """Re-reads weights.yaml and rebuilds the shared processor, for long-lived processes that reuse this module."""
+    global processor
+    settings.reload_weights()
     processor = DataProcessor()
+
+
+# Load, score and save run as one task: the frames never cross a Prefect task boundary,
+# and the individual steps have no retry or caching needs of their own.
+@task(name="Rank Products", log_prints=True)
+def rank_products_task(top_n: Optional[int] = None) -> pd.DataFrame:
     # Prefect's logger is automatically available in tasks when log_prints=True
-    prefect_logger = logging.getLogger("prefect.task_runs") 
-    prefect_logger.info("Task (Load Raw Product Data): Starting...")
+    prefect_logger = logging.getLogger("prefect.task_runs")
+    prefect_logger.info("Task (Rank Products): Loading raw product data...")
     df = processor.load_data()
     if df.empty:
-        prefect_logger.warning("Task (Load Raw Product Data): Raw data loading resulted in an empty DataFrame.")
-    else:
-        prefect_logger.info(f"Task (Load Raw Product Data): Successfully loaded {len(df)} rows of raw data.")
-    return df
+        prefect_logger.warning("Task (Rank Products): Raw data loading resulted in an empty DataFrame.")
+        return df
+    prefect_logger.info(f"Task (Rank Products): Successfully loaded {len(df)} rows of raw data.")
 
-@task(name="Process and Score Products", log_prints=True)
-def process_and_score_data_task(df: pd.DataFrame, top_n: Optional[int] = None) -> pd.DataFrame:
-    processor = DataProcessor()
-    prefect_logger = logging.getLogger("prefect.task_runs")
-    if df.empty:
-        prefect_logger.warning("Task (Process and Score Products): Input DataFrame for processing is empty. Skipping.")
-        return pd.DataFrame()
-    
     effective_top_n = top_n if top_n is not None else settings.WEIGHTS.get('top_n_products', 10)
-    prefect_logger.info(f"Task (Process and Score Products): Processing {len(df)} products for top_n={effective_top_n}...")
-    
-    processed_df = processor.process_and_score_data(df, top_n=effective_top_n)
-    prefect_logger.info(f"Task (Process and Score Products): Processing complete. {len(processed_df)} products ranked.")
-    return processed_df
+    prefect_logger.info(f"Task (Rank Products): Processing {len(df)} products for top_n={effective_top_n}...")
+    ranked_df = processor.process_and_score_data(df, top_n=effective_top_n)
+    prefect_logger.info(f"Task (Rank Products): Processing complete. {len(ranked_df)} products ranked.")
 
-@task(name="Save Ranked Products", log_prints=True)
-def save_ranked_data_task(df: pd.DataFrame) -> None:
-    processor = DataProcessor()
-    prefect_logger = logging.getLogger("prefect.task_runs")
-    if df.empty:
-        prefect_logger.warning("Task (Save Ranked Products): DataFrame for saving is empty. Skipping save.")
-        return
-    prefect_logger.info(f"Task (Save Ranked Products): Saving {len(df)} ranked products...")
-    processor.save_processed_data(df)
+    if ranked_df.empty:
+        prefect_logger.warning("Task (Rank Products): DataFrame for saving is empty. Skipping save.")
+        return ranked_df
+    prefect_logger.info(f"Task (Rank Products): Saving {len(ranked_df)} ranked products...")
+    processor.save_processed_data(ranked_df)
+    return ranked_df
 
 
 @flow(name="Product Ranking ETL Flow", log_prints=True)
@@ -57,16 +48,9 @@ def product_ranking_etl_flow(run_name: str = "default_run"):
     flow_logger = logging.getLogger("prefect.flow_runs") # Get Prefect's flow logger
     flow_logger.info(f"=== Starting Product Ranking ETL Flow: {run_name} ===")
     
-    raw_data_df = load_raw_data_task()
-    
-    if raw_data_df is not None and not raw_data_df.empty:
-        ranked_products_df = process_and_score_data_task(raw_data_df)
-        if ranked_products_df is not None and not ranked_products_df.empty:
-            save_ranked_data_task(ranked_products_df)
-        else:
-            flow_logger.warning("Flow: No products were ranked after processing. Output file will not be updated/created.")
-    else:
-        flow_logger.error("Flow: Raw data was empty or failed to load. ETL flow cannot proceed further.")
+    ranked_products_df = rank_products_task()
+    if ranked_products_df is None or ranked_products_df.empty:
+        flow_logger.warning("Flow: No products were ranked (raw data empty, failed to load, or all filtered). Output file will not be updated/created.")
     
     flow_logger.info(f"=== Product Ranking ETL Flow: {run_name} completed. ===")
 
@@ -1,85 +1,127 @@
 #!/usr/bin/env python3
 import logging
+import os
 import time
+import numpy as np
 import pandas as pd
 from pathlib import Path
-import sys
+from typing import Iterable, Iterator
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError: # Optional: falls back to DataFrame.to_csv
+    pa = pacsv = None
 
-# Adjust import paths to access config.settings
-project_root = Path(__file__).resolve().parent.parent
-sys.path.insert(0, str(project_root))
 from config.settings import settings
+from pipelines.data_processing import RAW_ARROW_TYPES
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def fetch_new_product_data_from_source() -> Optional[pd.DataFrame]:
+# Set SIMULATE_DELAY=1 to make the simulated fetch sleep like a real network call
+SIMULATE_DELAY = os.environ.get("SIMULATE_DELAY", "0") == "1"
+FETCH_BATCH_SIZE = 10_000 # Rows per page requested from the source; also bounds peak memory when saving
+# Declared once rather than inferred from the first page, which may type an all-null column as null
+# or an int-looking one narrower than later pages. Brand Tier is written as plain strings.
+RAW_SCHEMA = pa.schema([
+    (name, arrow_type.value_type if pa.types.is_dictionary(arrow_type) else arrow_type)
+    for name, arrow_type in RAW_ARROW_TYPES.items()
+]) if pa is not None else None
+
+def fetch_new_product_data_from_source(batch_size: int = FETCH_BATCH_SIZE) -> Iterator[pd.DataFrame]:
     """
-    This is a placeholder to simulate fetching new data.
-    Replace this with actual data fetching logic.
+    This is a placeholder to simulate fetching new data, one page of at most `batch_size` rows at a time.
+    Replace this with actual data fetching logic, yielding one DataFrame per page or cursor batch.
     - Connect to a database (e.g., using psycopg2, sqlalchemy, pyodbc).
     - Call an external API (e.g., using requests, httpx).
     - Read from a remote file (e.g., SFTP, S3).
     """
     logger.info("Simulating fetching new product data from an external source...")
-    time.sleep(1) # Simulate I/O or network delay
+    if SIMULATE_DELAY:
+        time.sleep(1) # Simulate I/O or network delay
 
     # --- Example: Simulate fetching data that looks like your CSV ---
     # In a real scenario, this data would come from your actual source
-    simulated_new_data = {
-        'Product Name': [f'New Product {i}' for i in range(1, 3)],
-        'Brand': ['NewBrandA', 'NewBrandB'],
-        'Brand Tier': ['A', 'C'],
-        'Price (USD)': [round(pd.np.random.uniform(10, 100), 2) for _ in range(2)],
-        'COGS (USD)': [round(pd.np.random.uniform(5, 50), 2) for _ in range(2)],
-        'Days of Inventory': [pd.np.random.randint(10, 90) for _ in range(2)],
-        'Units in Stock': [pd.np.random.randint(50, 500) for _ in range(2)],
-        'Views Last Month': [pd.np.random.randint(100, 5000) for _ in range(2)],
-        'Volume Sold Last Month': [pd.np.random.randint(10, 300) for _ in range(2)]
-    }
-    new_df = pd.DataFrame(simulated_new_data)
-    logger.info(f"Simulated fetching of {len(new_df)} new product entries.")
-    return new_df
+    rng = np.random.default_rng()
+    brands = np.array(['NewBrandA', 'NewBrandB'])
+    tiers = np.array(['A', 'C'])
+    total = 2
+    for start in range(0, total, batch_size):
+        n = min(batch_size, total - start) # Each numeric column below is drawn as one vectorized array of n values
+        ids = np.arange(start, start + n)
+        yield pd.DataFrame({
+            'Product Name': [f'New Product {i}' for i in ids + 1],
+            'Brand': brands[ids % len(brands)],
+            'Brand Tier': tiers[ids % len(tiers)],
+            'Price (USD)': np.round(rng.uniform(10, 100, n), 2),
+            'COGS (USD)': np.round(rng.uniform(5, 50, n), 2),
+            'Days of Inventory': rng.integers(10, 90, n),
+            'Units in Stock': rng.integers(50, 500, n),
+            'Views Last Month': rng.integers(100, 5000, n),
+            'Volume Sold Last Month': rng.integers(10, 300, n)
+        })
+    logger.info("Simulated fetching of %d new product entries.", total)
     # --- End Example ---
 
-    # If fetching fails, return None or raise an exception
-    # return None
+    # If fetching fails, raise an exception (or simply yield nothing)
 
-def save_new_raw_data(df: pd.DataFrame, raw_data_path: Path) -> bool:
-    """Saves the fetched DataFrame to the raw data path, overwriting the existing file."""
-    if df is None or df.empty:
-        logger.warning("No new data to save.")
-        return False
+def save_new_raw_data(chunks: Iterable[pd.DataFrame], raw_data_path: Path) -> bool:
+    """
+    Streams the fetched chunks to the raw data path, overwriting the existing file.
+    Only one chunk is held in memory at a time. Rows go to a temporary sibling file that is
+    renamed into place at the end, so readers never see a half-written catalogue.
+    With pyarrow, every chunk is cast to RAW_SCHEMA, so only the catalogue columns are written.
+    """
+    tmp_path = raw_data_path.with_name(raw_data_path.name + ".tmp")
+    writer = None
+    rows_written = 0
     try:
         raw_data_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(raw_data_path, index=False)
-        logger.info(f"New raw data successfully saved to {raw_data_path}")
+        for chunk in chunks:
+            if chunk is None or chunk.empty:
+                continue
+            if pacsv is not None:
+                if writer is None:
+                    writer = pacsv.CSVWriter(tmp_path, RAW_SCHEMA)
+                writer.write_table(pa.Table.from_pandas(chunk, schema=RAW_SCHEMA, preserve_index=False))
+            else:
+                chunk.to_csv(tmp_path, mode='a' if rows_written else 'w', header=not rows_written, index=False)
+            rows_written += len(chunk)
+        if writer is not None:
+            writer.close()
+            writer = None
+
+        if not rows_written:
+            logger.warning("No new data to save.")
+            return False
+        tmp_path.replace(raw_data_path)
+        logger.info("New raw data successfully saved to %s (%d rows)", raw_data_path, rows_written)
         return True
     except Exception as e:
-        logger.error(f"Failed to save new raw data to {raw_data_path}: {e}", exc_info=True)
+        logger.error("Failed to save new raw data to %s: %s", raw_data_path, e, exc_info=True)
         return False
+    finally:
+        if writer is not None:
+            writer.close()
+        tmp_path.unlink(missing_ok=True)
 
 def main():
     logger.info("--- Starting Data Refresh Process ---")
     
-    new_data_df = fetch_new_product_data_from_source()
-    
-    if new_data_df is not None and not new_data_df.empty:
-        save_success = save_new_raw_data(new_data_df, settings.RAW_DATA_PATH)
-        if save_success:
-            logger.info("Raw data updated. You should now run the main processing pipeline.")
-            logger.info("Consider triggering 'scripts/run_pipeline.py' or the Prefect flow directly.")
-            # Example of triggering the pipeline (requires product_ranking_etl_flow to be importable):
-            # from pipelines.ranking_pipeline import product_ranking_etl_flow
-            # from datetime import datetime
-            # current_time_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-            # flow_run_name = f"pipeline_after_refresh_{current_time_str}"
-            # logger.info(f"Attempting to trigger pipeline flow: {flow_run_name}")
-            # product_ranking_etl_flow(run_name=flow_run_name)
-        else:
-            logger.error("Failed to save the newly fetched raw data.")
+    save_success = save_new_raw_data(fetch_new_product_data_from_source(), settings.RAW_DATA_PATH)
+    if save_success:
+        logger.info("Raw data updated. You should now run the main processing pipeline.")
+        logger.info("Consider triggering 'scripts/run_pipeline.py' or the Prefect flow directly.")
+        # Example of triggering the pipeline (requires product_ranking_etl_flow to be importable):
+        # from pipelines.ranking_pipeline import product_ranking_etl_flow
+        # from datetime import datetime
+        # current_time_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # flow_run_name = f"pipeline_after_refresh_{current_time_str}"
+        # logger.info("Attempting to trigger pipeline flow: %s", flow_run_name)
+        # product_ranking_etl_flow(run_name=flow_run_name)
     else:
-        logger.warning("No new data was fetched from the source.")
+        logger.error("Raw data was not updated: no new data was fetched or it failed to save.")
         
     logger.info("--- Data Refresh Process Finished ---")
 
@@ -1,28 +1,27 @@
 #!/usr/bin/env python3
 import logging
+import logging.config
 from datetime import datetime
 
-# Adjust import paths based on project structure
-import sys
-from pathlib import Path
-project_root = Path(__file__).resolve().parent.parent
-sys.path.insert(0, str(project_root))
-
 from pipelines.ranking_pipeline import product_ranking_etl_flow
 
 # Configure basic logging for this script
 # Note: Prefect flows and tasks have their own logging configured via log_prints or custom loggers
-script_logger = logging.getLogger("run_pipeline_script")
-script_logger.setLevel(logging.INFO)
-# Avoid adding duplicate handlers if this script is imported elsewhere or run multiple times in same session
-if not script_logger.handlers:
-    handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    script_logger.addHandler(handler)
+def configure_logging(logger_name: str) -> logging.Logger:
+    """Sends `logger_name` to stdout at INFO; shared with the other pipeline scripts."""
+    logging.config.dictConfig({
+        "version": 1,
+        "disable_existing_loggers": False, # Keep the pipeline and Prefect loggers created by the imports above
+        "formatters": {"standard": {"format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s"}},
+        "handlers": {"stdout": {"class": "logging.StreamHandler", "stream": "ext://sys.stdout", "formatter": "standard"}},
+        "loggers": {logger_name: {"handlers": ["stdout"], "level": "INFO"}},
+    })
+    return logging.getLogger(logger_name)
 
+script_logger = configure_logging("run_pipeline_script")
 
-if __name__ == "__main__":
+
+def main():
     script_logger.info("Starting product ranking ETL pipeline script...")
     
     current_time_str = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -30,6 +29,9 @@ if __name__ == "__main__":
     
     try:
         product_ranking_etl_flow(run_name=flow_run_name)
-        script_logger.info(f"Product ranking ETL pipeline script finished successfully for run: {flow_run_name}.")
+        script_logger.info("Product ranking ETL pipeline script finished successfully for run: %s.", flow_run_name)
     except Exception as e:
-        script_logger.error(f"An error occurred during the pipeline execution for run {flow_run_name}: {e}", exc_info=True)
\ No newline at end of file
+        script_logger.error("An error occurred during the pipeline execution for run %s: %s", flow_run_name, e, exc_info=True)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
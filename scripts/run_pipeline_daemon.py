@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+from config.settings import settings
+from pipelines import ranking_pipeline
+from pipelines.ranking_pipeline import product_ranking_etl_flow
+from scripts.run_pipeline import configure_logging
+
+# Long-lived counterpart to run_pipeline.py: imports, the Prefect engine, the compiled scoring
+# kernel and the shared DataProcessor are set up once and reused by every rerun of the flow.
+script_logger = configure_logging("run_pipeline_daemon")
+
+DEBOUNCE_SECONDS = 2.0 # Editors and exports often write a file in several steps; wait for them to settle
+
+
+class FileChangeHandler(FileSystemEventHandler):
+    """Sets every event in `events` whenever the watched file is created, modified or moved into place."""
+
+    def __init__(self, path: Path, *events: threading.Event):
+        super().__init__()
+        self.path = path # Already absolute: settings paths are built from BASE_DIR
+        self.events = events
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in ("created", "modified", "moved"):
+            return
+        # Moves count when the watched file is the destination, e.g. an atomic rename by the refresh script
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        # Event paths are joined onto the watched directory string, so they compare without resolving
+        if any(p and Path(p) == self.path for p in paths):
+            for changed in self.events:
+                changed.set()
+
+
+def run_flow() -> None:
+    flow_run_name = f"product_ranking_run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    try:
+        product_ranking_etl_flow(run_name=flow_run_name)
+        script_logger.info("Product ranking ETL flow finished successfully for run: %s.", flow_run_name)
+    except Exception as e:
+        script_logger.error("An error occurred during the pipeline execution for run %s: %s", flow_run_name, e, exc_info=True)
+
+
+def main() -> None:
+    raw_data_path, weights_path = settings.RAW_DATA_PATH, settings.WEIGHTS_FILE_PATH
+    changed = threading.Event() # Any watched file changed: rerun the flow
+    weights_changed = threading.Event() # weights.yaml changed: reload weights before the rerun
+    observer = Observer()
+    observer.schedule(FileChangeHandler(raw_data_path, changed), str(raw_data_path.parent), recursive=False)
+    observer.schedule(FileChangeHandler(weights_path, weights_changed, changed), str(weights_path.parent), recursive=False)
+    observer.start()
+    script_logger.info("Watching %s and %s for changes. Press Ctrl+C to stop.", raw_data_path, weights_path)
+
+    changed.set() # Rank the current raw data once on startup
+    try:
+        while True:
+            if not changed.wait(timeout=1.0):
+                continue
+            # Let a burst of events settle, then run once for all of them
+            while changed.wait(timeout=DEBOUNCE_SECONDS):
+                changed.clear()
+            if weights_changed.is_set():
+                weights_changed.clear()
+                # The shared processor copied the old weights when it was built, so rebuild it
+                script_logger.info("%s changed. Reloading weights.", weights_path)
+                ranking_pipeline.reload_processor()
+            # The flow runs here on the main thread, never on the observer's thread
+            run_flow()
+    except KeyboardInterrupt:
+        script_logger.info("Stopping pipeline daemon...")
+    finally:
+        observer.stop()
+        observer.join()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
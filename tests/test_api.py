@@ -0,0 +1,79 @@
+import os
+import pytest
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from api import app as app_module
+from config.settings import settings
+
+@pytest.fixture
+def sample_raw_csv_content():
+    return (
+        "Product Name,Brand,Brand Tier,Price (USD),COGS (USD),Days of Inventory,Units in Stock,Views Last Month,Volume Sold Last Month\n"
+        "Test Product 1,BrandA,A,100,50,30,100,1000,100\n"
+        "Test Product 2,BrandB,B,80,60,40,50,500,50\n"
+        "Test Product 2,BrandDup,C,10,5,40,50,500,50\n" # Duplicate name: the first row is served
+        "Filtered Product LowStock,BrandC,C,50,25,20,5,200,20\n"
+    )
+
+@pytest.fixture
+def data_paths(tmp_path, monkeypatch, sample_raw_csv_content):
+    # Point the API at a private copy of the data and start every test with cold caches
+    raw_path = tmp_path / "raw.csv"
+    raw_path.write_text(sample_raw_csv_content)
+    processed_path = tmp_path / "processed" / "ranked_products.csv"
+    monkeypatch.setattr(settings, "RAW_DATA_PATH", raw_path)
+    monkeypatch.setattr(settings, "PROCESSED_DATA_PATH", processed_path)
+    monkeypatch.setattr(app_module, "_ranked_cache", {"mtime": None, "records": None, "json_by_top_n": {}})
+    monkeypatch.setattr(app_module, "_product_index_cache", {"mtime": None, "index": None})
+    return raw_path, processed_path
+
+def test_startup_ranks_and_warms_cache_when_processed_file_missing(data_paths):
+    _, processed_path = data_paths
+    assert not processed_path.exists()
+
+    with TestClient(app_module.app) as client:
+        assert processed_path.exists() # Written by the pipeline run at startup
+        assert app_module._ranked_cache["records"] is not None
+
+        response = client.get("/ranked-products/", params={"top_n": 10})
+        assert response.status_code == 200
+        body = response.json()
+        assert [p["Product Name"] for p in body] == pd.read_csv(processed_path)["Product Name"].tolist()
+        assert [p["rank"] for p in body] == list(range(1, len(body) + 1))
+        assert "Filtered Product LowStock" not in {p["Product Name"] for p in body}
+
+        assert len(client.get("/ranked-products/", params={"top_n": 1}).json()) == 1
+        assert client.get("/ranked-products/", params={"top_n": -1}).json() == body[:-1]
+
+def test_rewritten_processed_file_is_picked_up(data_paths):
+    _, processed_path = data_paths
+    with TestClient(app_module.app) as client:
+        assert client.get("/ranked-products/").status_code == 200
+
+        pd.DataFrame({
+            "Product Name": ["Rewritten Product"], "Brand": ["BrandR"], "Price (USD)": [12.5], "score": [0.5], "rank": [1]
+        }).to_csv(processed_path, index=False)
+        stat = processed_path.stat()
+        os.utime(processed_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9)) # Guarantee a new mtime
+
+        response = client.get("/ranked-products/")
+        assert response.status_code == 200
+        assert response.json() == [{"Product Name": "Rewritten Product", "Brand": "BrandR", "Price (USD)": 12.5, "score": 0.5, "rank": 1}]
+
+def test_ranked_products_missing_processed_file(data_paths):
+    raw_path, processed_path = data_paths
+    with TestClient(app_module.app) as client:
+        processed_path.unlink()
+        assert client.get("/ranked-products/").status_code == 503 # Raw data is there: the pipeline has not run yet
+
+        raw_path.unlink()
+        assert client.get("/ranked-products/").status_code == 404
+
+def test_product_details(data_paths):
+    with TestClient(app_module.app) as client:
+        response = client.get("/product-details/Test Product 2")
+        assert response.status_code == 200
+        assert response.json()["Brand"] == "BrandB" # First row wins on duplicate names
+
+        assert client.get("/product-details/No Such Product").status_code == 404
@@ -1,37 +1,34 @@
 import pytest
+import numpy as np
 import pandas as pd
-from pathlib import Path
 from unittest.mock import patch, MagicMock
 
-# Adjust import paths
-import sys
-project_root_path = Path(__file__).resolve().parent.parent
-sys.path.insert(0, str(project_root_path))
-
-from pipelines.data_processing import DataProcessor
+from pipelines.data_processing import DataProcessor, pl
 from config.settings import settings # For accessing paths, weights for scorer
 from models.scoring_model import ProductScorer # To potentially mock or use
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def data_processor_instance():
-    # This will initialize DataProcessor, which in turn initializes ProductScorer with actual weights
+    # This will initialize DataProcessor, which in turn initializes ProductScorer with actual weights.
+    # Shared across the module: tests only patch it through context managers that restore it.
     return DataProcessor()
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_raw_csv_content():
     # Match your actual CSV columns
     return (
         "Product Name,Brand,Brand Tier,Price (USD),COGS (USD),Days of Inventory,Units in Stock,Views Last Month,Volume Sold Last Month\n"
         "Test Product 1,BrandA,A,100,50,30,100,1000,100\n"
-        "Test Product 2,BrandB,B,80,60,60,50,500,50\n"
+        "Test Product 2,BrandB,B,80,60,40,50,500,50\n" # Within max_inventory_days in default weights
         "Filtered Product LowStock,BrandC,C,50,25,20,5,200,20\n" # Will be filtered by min_stock in default weights
         "Filtered Product OldStock,BrandD,A,120,60,100,30,300,30\n" # Will be filtered by max_inventory_days in default weights
     )
 
-@pytest.fixture
-def temp_raw_data_file(tmp_path, sample_raw_csv_content):
-    # Create a temporary raw CSV file for testing load_data
-    raw_file = tmp_path / "temp_raw_data.csv"
+@pytest.fixture(scope="session")
+def temp_raw_data_file(tmp_path_factory, sample_raw_csv_content):
+    # Create a temporary raw CSV file for testing load_data, written once per session.
+    # Tests only read it; one that needs to modify it should copy it into its own tmp_path.
+    raw_file = tmp_path_factory.mktemp("data") / "temp_raw_data.csv"
     raw_file.write_text(sample_raw_csv_content)
     return raw_file
 
@@ -52,9 +49,9 @@ def test_process_and_score_data_integration(data_processor_instance, temp_raw_da
     Tests the integration of DataProcessor with ProductScorer using actual scoring.
     Relies on the correctness of ProductScorer and weights.yaml.
     """
-    raw_df = pd.read_csv(temp_raw_data_file)
+    raw_df = data_processor_instance.load_data(file_path=temp_raw_data_file)
     
-    # Assuming default weights: min_stock=10, max_inventory_days=90
+    # Assuming default weights (config/weights.yaml): min_stock=10, max_inventory_days=50
     # "Filtered Product LowStock" (stock=5) should be out.
     # "Filtered Product OldStock" (days=100) should be out.
     # Expecting 2 products to remain and be scored.
@@ -67,16 +64,57 @@ def test_process_and_score_data_integration(data_processor_instance, temp_raw_da
     assert len(processed_df) == 2 # Only "Test Product 1" and "Test Product 2" should pass filters
     
     # Check if the remaining products are the correct ones
-    remaining_products = processed_df["Product Name"].tolist()
-    assert "Test Product 1" in remaining_products
-    assert "Test Product 2" in remaining_products
-    assert "Filtered Product LowStock" not in remaining_products
-    assert "Filtered Product OldStock" not in remaining_products
+    remaining_products = set(processed_df["Product Name"].to_numpy())
+    assert remaining_products >= {"Test Product 1", "Test Product 2"}
+    assert remaining_products.isdisjoint({"Filtered Product LowStock", "Filtered Product OldStock"})
+
+    scores = processed_df["score"].to_numpy()
+    if len(scores) > 1:
+        assert scores[0] >= scores[1] # Check ranking order
+
+def test_process_and_score_data_sees_in_place_edits(data_processor_instance, temp_raw_data_file):
+    raw_df = data_processor_instance.load_data(file_path=temp_raw_data_file)
+    assert not data_processor_instance.process_and_score_data(raw_df, top_n=5).empty
+
+    raw_df["Units in Stock"] = 0 # Rescoring the same frame must see the edit
+    assert data_processor_instance.process_and_score_data(raw_df, top_n=5).empty
+
+def tied_scores_df():
+    # P1 (top sales and margin) and P4 (top sales, tier and engagement) both score exactly 0.7
+    return pd.DataFrame({
+        'Product Name': ['P0', 'P1', 'P2', 'P3', 'P4'],
+        'Brand': ['BrandT'] * 5,
+        'Brand Tier': ['C', 'C', 'C', 'A', 'A'],
+        'Price (USD)': [10.0] * 5,
+        'COGS (USD)': [8.0, 2.0, 8.0, 8.0, 8.0],
+        'Days of Inventory': [10] * 5,
+        'Units in Stock': [100] * 5,
+        'Views Last Month': [100, 100, 100, 100, 700],
+        'Volume Sold Last Month': [10, 70, 10, 10, 70]
+    })
+
+@pytest.mark.skipif(pl is None, reason="polars not installed")
+@pytest.mark.parametrize("source", ["file", "tied"])
+def test_polars_engine_matches_pandas(data_processor_instance, temp_raw_data_file, monkeypatch, source):
+    if source == "file":
+        raw_df = data_processor_instance.load_data(file_path=temp_raw_data_file)
+    else:
+        raw_df = tied_scores_df()
+
+    monkeypatch.setattr(settings, "ENGINE", "pandas")
+    pandas_df = data_processor_instance.process_and_score_data(raw_df, top_n=5)
+    monkeypatch.setattr(settings, "ENGINE", "polars")
+    polars_df = data_processor_instance.process_and_score_data(raw_df, top_n=5)
 
-    if len(processed_df) > 1:
-        assert processed_df.iloc[0]["score"] >= processed_df.iloc[1]["score"] # Check ranking order
+    assert list(polars_df.columns) == list(pandas_df.columns)
+    assert polars_df["Product Name"].tolist() == pandas_df["Product Name"].tolist()
+    assert polars_df["rank"].tolist() == pandas_df["rank"].tolist()
+    np.testing.assert_allclose(polars_df["score"].to_numpy(), pandas_df["score"].to_numpy(), rtol=1e-6)
+    if source == "tied":
+        assert polars_df["Product Name"].tolist()[:2] == ["P1", "P4"] # Ties keep row order
 
-def test_save_processed_data(data_processor_instance, tmp_path):
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_save_processed_data(data_processor_instance, tmp_path, fmt):
     df_to_save = pd.DataFrame({
         'Product Name': ['Saved Product 1'],
         'Brand': ['BrandSave'],
@@ -84,14 +122,19 @@ def test_save_processed_data(data_processor_instance, tmp_path):
         'score': [0.95],
         'rank': [1]
     })
-    output_file = tmp_path / "processed_test_output.csv"
+    output_file = tmp_path / f"processed_test_output.{fmt}"
     
-    data_processor_instance.save_processed_data(df_to_save, file_path=output_file)
+    data_processor_instance.save_processed_data(df_to_save, file_path=output_file, format=fmt)
     
     assert output_file.exists()
-    saved_df = pd.read_csv(output_file)
-    assert len(saved_df) == 1
-    pd.testing.assert_frame_equal(saved_df, df_to_save, check_dtype=False) # check_dtype=False for flexibility
+    if fmt == "parquet":
+        saved_df = pd.read_parquet(output_file)
+        assert len(saved_df) == 1
+        pd.testing.assert_frame_equal(saved_df, df_to_save) # Parquet round-trips dtypes exactly
+    else:
+        saved_df = pd.read_csv(output_file)
+        assert len(saved_df) == 1
+        pd.testing.assert_frame_equal(saved_df, df_to_save, check_dtype=False) # check_dtype=False for flexibility
 
 @patch('pipelines.data_processing.DataProcessor.load_data')
 @patch('pipelines.data_processing.DataProcessor.process_and_score_data')
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from pipelines.data_processing import DataProcessor
+from scripts.refresh_data import save_new_raw_data
+
+def make_chunk(names, tiers, units):
+    n = len(names)
+    return pd.DataFrame({
+        'Product Name': names,
+        'Brand': ['BrandA'] * n,
+        'Brand Tier': tiers,
+        'Price (USD)': [20.0] * n,
+        'COGS (USD)': [10.0] * n,
+        'Days of Inventory': [30] * n,
+        'Units in Stock': units,
+        'Views Last Month': [100] * n,
+        'Volume Sold Last Month': [10] * n
+    })
+
+def test_save_new_raw_data_chunks_with_differing_types(tmp_path):
+    raw_path = tmp_path / "raw.csv"
+    chunks = [
+        make_chunk(['P1', 'P2'], [None, None], [50, 60]), # All-null tier on the first page
+        make_chunk(['P3', 'P4'], ['A', 'B'], [70.0, np.nan]) # Strings, and a float-typed int column
+    ]
+
+    assert save_new_raw_data(iter(chunks), raw_path)
+    assert not raw_path.with_name(raw_path.name + ".tmp").exists()
+
+    saved = DataProcessor().load_data(file_path=raw_path)
+    assert saved['Product Name'].tolist() == ['P1', 'P2', 'P3', 'P4']
+    assert saved['Brand Tier'].tolist()[2:] == ['A', 'B']
+    assert saved['Units in Stock'].tolist()[:3] == [50, 60, 70]
+
+def test_save_new_raw_data_without_rows_keeps_existing_file(tmp_path):
+    raw_path = tmp_path / "raw.csv"
+    raw_path.write_text("existing")
+
+    assert not save_new_raw_data(iter([pd.DataFrame()]), raw_path)
+    assert raw_path.read_text() == "existing"
@@ -1,7 +1,9 @@
 import pytest
+import numpy as np
 import pandas as pd
 from models.scoring_model import ProductScorer
-from config import settings
+from models.scoring_kernel import score_kernel
+from config.settings import settings
 
 @pytest.fixture
 def sample_data():
@@ -25,8 +27,67 @@ def test_product_scorer(sample_data):
     assert len(processed_df) == 2  # Should filter out Product C (stock < 10)
     
     # Check scoring
-    assert all(col in processed_df.columns for col in ['score', 'profit_margin'])
-    assert processed_df['score'].between(0, 1).all()
+    assert all(col in processed_df.columns for col in ['score', 'rank'])
+    scores = processed_df['score'].to_numpy()
+    assert (scores >= 0).all() and (scores <= 1).all()
     
     # Check ranking
-    assert processed_df['score'].iloc[0] >= processed_df['score'].iloc[1]
\ No newline at end of file
+    assert scores[0] >= scores[1]
+
+@pytest.mark.skipif(score_kernel is None, reason="numba not installed")
+def test_score_kernel_matches_numpy_stages():
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame({
+        'Product Name': [f'Product {i}' for i in range(n)],
+        'Brand': ['Brand'] * n,
+        'Brand Tier': rng.choice(['A', 'B', 'C', 'D'], n),
+        'Price (USD)': rng.uniform(0, 100, n).round(2),
+        'COGS (USD)': rng.uniform(0, 60, n).round(2),
+        'Days of Inventory': rng.integers(1, 120, n),
+        'Units in Stock': rng.integers(0, 500, n),
+        'Views Last Month': rng.integers(0, 5000, n),
+        'Volume Sold Last Month': rng.integers(0, 300, n)
+    })
+    weights = {
+        'scoring_weights': {'sales_velocity': 0.4, 'profit_margin': 0.3, 'brand_tier': 0.2, 'engagement': 0.1},
+        'brand_tier_weights': {'A': 1.0, 'B': 0.7, 'C': 0.4},
+        'filters': {'min_stock': 10, 'max_inventory_days': 90}
+    }
+    kernel_scorer = ProductScorer(weights)
+    stages_scorer = ProductScorer(weights)
+    stages_scorer.use_kernel = False
+
+    kernel_df = kernel_scorer.process(df, top_n=n)
+    stages_df = stages_scorer.process(df, top_n=n)
+
+    assert kernel_df['Product Name'].tolist() == stages_df['Product Name'].tolist()
+    np.testing.assert_allclose(kernel_df['score'], stages_df['score'], rtol=1e-5)
+
+    # P2, P3 and P4 all score 0.45 exactly, but each path rounds them differently in the last digits
+    tied_df = pd.DataFrame({
+        'Product Name': ['P0', 'P1', 'P2', 'P3', 'P4'],
+        'Brand': ['Brand'] * 5,
+        'Brand Tier': ['C', 'C', 'C', 'B', 'C'],
+        'Price (USD)': [10.0] * 5,
+        'COGS (USD)': [2.0, 5.0, 8.0, 8.0, 5.0],
+        'Days of Inventory': [10] * 5,
+        'Units in Stock': [100] * 5,
+        'Views Last Month': [400, 100, 400, 400, 700],
+        'Volume Sold Last Month': [70, 10, 70, 40, 40]
+    })
+    expected_order = ['P0', 'P2', 'P3', 'P4', 'P1'] # Ties keep row order
+    assert kernel_scorer.process(tied_df, top_n=5)['Product Name'].tolist() == expected_order
+    assert stages_scorer.process(tied_df, top_n=5)['Product Name'].tolist() == expected_order
+
+
+def test_rank_products_breaks_ties_by_row_order():
+    scorer = ProductScorer(settings.WEIGHTS)
+    scores = np.full(45, 0.5)
+    scores[[40, 42, 44]] = 0.9
+    full_order = scorer.rank_products(scores, len(scores))
+
+    # Small top_n takes the partition path; it must agree with the full stable sort on ties
+    for top_n in (1, 3, 5, 10):
+        np.testing.assert_array_equal(scorer.rank_products(scores, top_n), full_order[:top_n])
+    np.testing.assert_array_equal(scorer.rank_products(scores, 5), [40, 42, 44, 0, 1])
\ No newline at end of file